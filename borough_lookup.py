@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import Polygon, shape
+from h3.api import basic_int as h3i
+
+# Rough NYC bounding box; anything outside is a bad geocode
+NYC_LAT_RANGE = (40.49, 40.92)
+NYC_LON_RANGE = (-74.27, -73.68)
+
+LOOKUP_RESOLUTION = 10  # ~76m hexagon edges
+
+
+def load_borough_polygons(geojson_path):
+    with open(geojson_path) as f:
+        features = json.load(f)['features']
+
+    polygons = {}
+    for feature in features:
+        name = feature['properties']['boro_name'].upper()
+        polygons[name] = shape(feature['geometry'])
+
+    boroughs = sorted(polygons)
+    return boroughs, [polygons[b] for b in boroughs]
+
+
+# Map every H3 cell that lies entirely inside one borough to that borough. Any cell a
+# borough edge passes through is left out, so points in it fall through to the exact test.
+def build_cell_lookup(boroughs, polygons, resolution=LOOKUP_RESOLUTION):
+    interior_cells = []
+    interior_codes = []
+    for idx, polygon in enumerate(polygons):
+        cells = list(h3i.geo_to_cells(polygon, resolution))
+        if not cells:
+            continue
+        # cell_to_boundary gives (lat, lng) pairs; shapely wants (x=lng, y=lat)
+        hexagons = [Polygon([(lng, lat) for lat, lng in h3i.cell_to_boundary(cell)]) for cell in cells]
+        shapely.prepare(polygon)
+        inside = shapely.contains(polygon, hexagons)
+        interior_cells.extend(np.asarray(cells, dtype=np.uint64)[inside])
+        interior_codes.extend([idx] * int(inside.sum()))
+
+    cells = np.array(interior_cells, dtype=np.uint64)
+    codes = np.array(interior_codes, dtype=np.int8)
+    order = np.argsort(cells)
+    return cells[order], codes[order]
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_cell_lookup(geojson_path, cache_path, resolution=LOOKUP_RESOLUTION):
+    boroughs, polygons = load_borough_polygons(geojson_path)
+    source_hash = _file_hash(geojson_path)
+
+    # Rebuild whenever the boundaries file, the borough list or the resolution changes
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            if (int(cached['resolution']) == resolution
+                    and list(cached['boroughs']) == boroughs
+                    and 'source_hash' in cached.files
+                    and str(cached['source_hash']) == source_hash):
+                return boroughs, polygons, cached['cells'], cached['codes']
+
+    cells, codes = build_cell_lookup(boroughs, polygons, resolution)
+    np.savez(cache_path, cells=cells, codes=codes, boroughs=np.array(boroughs),
+             resolution=resolution, source_hash=source_hash)
+    return boroughs, polygons, cells, codes
+
+
+def assign_boroughs(lat, lon, boroughs, polygons, cells, codes, resolution=LOOKUP_RESOLUTION):
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    result = np.full(len(lat), -1, dtype=np.int8)
+    if len(lat) == 0:
+        return pd.Categorical.from_codes(result, categories=boroughs)
+
+    # Crashes cluster at intersections, so index each distinct coordinate only once.
+    # Packing (lat, lon) into one complex key keeps the dedup a single 1-D hash pass.
+    inverse, unique_keys = pd.factorize(lat + 1j * lon)
+    unique_lat = unique_keys.real
+    unique_lon = unique_keys.imag
+
+    point_cells = np.fromiter(
+        (h3i.latlng_to_cell(la, lo, resolution) for la, lo in zip(unique_lat.tolist(), unique_lon.tolist())),
+        dtype=np.uint64,
+        count=len(unique_keys)
+    )
+
+    unique_result = np.full(len(unique_keys), -1, dtype=np.int8)
+    if len(cells):
+        pos = np.searchsorted(cells, point_cells).clip(max=len(cells) - 1)
+        hit = cells[pos] == point_cells
+        unique_result[hit] = codes[pos[hit]]
+    else:
+        hit = np.zeros(len(unique_keys), dtype=bool)
+
+    # Exact tests only for points in boundary cells (or just outside every polygon)
+    miss = np.flatnonzero(~hit)
+    miss_lon = unique_lon[miss]
+    miss_lat = unique_lat[miss]
+    for idx, polygon in enumerate(polygons):
+        shapely.prepare(polygon)
+        inside = shapely.contains_xy(polygon, miss_lon, miss_lat)
+        unique_result[miss[inside]] = idx
+
+    result[:] = unique_result[inverse]
+    return pd.Categorical.from_codes(result, categories=boroughs)
+
+
+def backfill_borough(collision_data, geojson_path, cache_path):
+    lat = collision_data['LATITUDE']
+    lon = collision_data['LONGITUDE']
+
+    # Null out (0,0) and out-of-city geocodes so they never reach the H3 step or the maps
+    valid_coords = (lat.between(*NYC_LAT_RANGE) & lon.between(*NYC_LON_RANGE))
+    invalid_coords = lat.notna() & lon.notna() & ~valid_coords
+    collision_data.loc[invalid_coords, ['LATITUDE', 'LONGITUDE']] = np.nan
+
+    # 'string' dtype so .str works even when the column is all-NaN float
+    borough = collision_data['BOROUGH'].astype('string')
+    missing_borough = borough.isna() | (borough.str.strip() == '').fillna(False)
+    candidates = missing_borough & valid_coords
+
+    boroughs, polygons, cells, codes = load_cell_lookup(geojson_path, cache_path)
+    assigned = assign_boroughs(
+        collision_data.loc[candidates, 'LATITUDE'].to_numpy(),
+        collision_data.loc[candidates, 'LONGITUDE'].to_numpy(),
+        boroughs, polygons, cells, codes
+    )
+
+    assigned = pd.Series(assigned, index=collision_data.index[candidates]).dropna()
+    if len(assigned) and not pd.api.types.is_string_dtype(collision_data['BOROUGH']):
+        # An all-blank column is read as float NaN, which can't hold borough names
+        collision_data['BOROUGH'] = collision_data['BOROUGH'].astype(object)
+    collision_data.loc[assigned.index, 'BOROUGH'] = assigned.astype(str)
+
+    return collision_data, int(invalid_coords.sum()), len(assigned)
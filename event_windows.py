@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+# Weather category -> (amount column, minimum amount) needed for a step to count as wet.
+# Open-Meteo names the amounts differently in daily and hourly exports.
+DAILY_ONSET_THRESHOLDS = {
+    'Drizzle': ('precipitation_sum (mm)', 0.5),
+    'Rain': ('precipitation_sum (mm)', 1.0),
+    'Thunderstorm': ('precipitation_sum (mm)', 1.0),
+    'Snow': ('snowfall_sum (cm)', 0.5),
+}
+
+HOURLY_ONSET_THRESHOLDS = {
+    'Drizzle': ('precipitation (mm)', 0.1),
+    'Rain': ('precipitation (mm)', 0.2),
+    'Thunderstorm': ('precipitation (mm)', 0.2),
+    'Snow': ('snowfall (cm)', 0.1),
+}
+
+# Window name -> (start offset, end offset) relative to onset, end exclusive
+DEFAULT_WINDOWS = {
+    '3h before': (pd.Timedelta(hours=-3), pd.Timedelta(0)),
+    '3h after': (pd.Timedelta(0), pd.Timedelta(hours=3)),
+    '6h before': (pd.Timedelta(hours=-6), pd.Timedelta(0)),
+    '6h after': (pd.Timedelta(0), pd.Timedelta(hours=6)),
+    '24h before': (pd.Timedelta(hours=-24), pd.Timedelta(0)),
+    '24h after': (pd.Timedelta(0), pd.Timedelta(hours=24)),
+    '72h before': (pd.Timedelta(hours=-72), pd.Timedelta(0)),
+    '72h after': (pd.Timedelta(0), pd.Timedelta(hours=72)),
+}
+
+
+def longest_lookback(windows):
+    return max([-start for start, _ in windows.values() if start < pd.Timedelta(0)],
+               default=pd.Timedelta(0))
+
+
+def resolution_label(step):
+    step = pd.Timedelta(step)
+    if step == pd.Timedelta(days=1):
+        return 'daily'
+    if step == pd.Timedelta(hours=1):
+        return 'hourly'
+    return str(step)
+
+
+def crash_timestamps(collisions):
+    # 'CRASH TIME' is H:MM with at most 1440 distinct values: parse those once and add
+    # them to the already-parsed date instead of re-parsing every full string
+    time_codes, unique_times = pd.factorize(collisions['CRASH TIME'])
+    offsets = pd.to_timedelta(pd.Series(unique_times).astype(str) + ':00', errors='coerce')
+    offsets = offsets.fillna(pd.Timedelta(0)).to_numpy(dtype='timedelta64[ns]')
+
+    times = np.zeros(len(time_codes), dtype='timedelta64[ns]')
+    times[time_codes >= 0] = offsets[time_codes[time_codes >= 0]]
+    timestamps = collisions['date'].to_numpy(dtype='datetime64[ns]') + times
+    return np.sort(timestamps)
+
+
+# An onset is the first wet step of a spell: no wet step of any category and no gap in
+# the series within dry_lookback before it. A change of category inside a spell (Rain
+# then Snow) is not a new onset, so every "before" window up to dry_lookback is dry.
+def detect_onsets(weather_df, category_column='weather_category', time_column='date',
+                  thresholds=DAILY_ONSET_THRESHOLDS, dry_lookback=longest_lookback(DEFAULT_WINDOWS)):
+    amount_columns = {column for column, _ in thresholds.values()}
+    if not amount_columns & set(weather_df.columns):
+        raise ValueError(f"None of the threshold columns {sorted(amount_columns)} are in the weather "
+                         f"data; pass thresholds matching its columns (daily vs hourly export)")
+
+    weather_df = weather_df.sort_values(time_column)
+    times = weather_df[time_column].to_numpy(dtype='datetime64[ns]')
+    categories = weather_df[category_column].to_numpy()
+    step = np.diff(times).min() if len(times) > 1 else np.timedelta64(1, 'D')
+
+    wet = np.zeros(len(weather_df), dtype=bool)
+    amounts = np.full(len(weather_df), np.nan)
+    for category, (amount_column, min_amount) in thresholds.items():
+        if amount_column not in weather_df.columns:
+            continue
+        values = weather_df[amount_column].to_numpy(dtype=np.float64)
+        is_wet = (categories == category) & (values >= min_amount)
+        wet |= is_wet
+        amounts[is_wet] = values[is_wet]
+
+    # Wet steps and present steps within [t - dry_lookback, t), via cumulative sums
+    positions = np.arange(len(times))
+    lookback_start = np.searchsorted(times, times - pd.Timedelta(dry_lookback).to_timedelta64(), side='left')
+    wet_before = np.concatenate([[0], np.cumsum(wet)])
+    wet_in_lookback = wet_before[positions] - wet_before[lookback_start]
+    required_steps = int(pd.Timedelta(dry_lookback) // pd.Timedelta(step))
+    covered = (positions - lookback_start) >= required_steps
+    onset = wet & (wet_in_lookback == 0) & covered
+
+    return pd.DataFrame({
+        'onset': times[onset],
+        'weather_category': categories[onset],
+        'amount': amounts[onset],
+        'weather_resolution': resolution_label(step),
+    })
+
+
+def count_in_windows(sorted_times, onsets, windows=DEFAULT_WINDOWS):
+    onset_times = onsets['onset'].to_numpy(dtype='datetime64[ns]')
+    starts = np.array([start.to_timedelta64() for start, _ in windows.values()], dtype='timedelta64[ns]')
+    ends = np.array([end.to_timedelta64() for _, end in windows.values()], dtype='timedelta64[ns]')
+
+    # Every (event, window) bound in one searchsorted call per side
+    lo = np.searchsorted(sorted_times, onset_times[:, None] + starts[None, :], side='left')
+    hi = np.searchsorted(sorted_times, onset_times[:, None] + ends[None, :], side='left')
+
+    counts = pd.DataFrame(hi - lo, columns=list(windows), index=onsets.index)
+    return pd.concat([onsets, counts], axis=1)
+
+
+def summarize_windows(event_counts, windows=DEFAULT_WINDOWS):
+    # Keep the input resolution next to the numbers: with daily weather every onset is
+    # midnight of the first wet day, so hour windows are day-level results
+    groups = event_counts.groupby(['weather_resolution', 'weather_category'])
+    summary = groups[list(windows)].mean()
+    summary.insert(0, 'events', groups.size())
+
+    # Pair each 'after' window with its matching 'before' window
+    for name in windows:
+        if name.endswith(' after'):
+            before = name[:-len(' after')] + ' before'
+            if before in windows:
+                ratio_name = name[:-len(' after')] + ' after/before'
+                summary[ratio_name] = summary[name] / summary[before].replace(0, np.nan)
+
+    return summary.reset_index()
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+FACTOR_COLUMNS = [f'CONTRIBUTING FACTOR VEHICLE {i}' for i in range(1, 6)]
+VEHICLE_COLUMNS = [f'VEHICLE TYPE CODE {i}' for i in range(1, 6)]
+
+
+def _normalize_factor(label):
+    return label.strip()
+
+
+def _normalize_vehicle(label):
+    # Free-text vehicle types mix cases ('Sedan', 'SEDAN'); group them case-insensitively
+    return label.strip().casefold()
+
+
+def encode_long(collisions, columns, normalize=_normalize_factor):
+    # Melt the wide string columns into (row position, label code) pairs without
+    # materializing a long string column: each column is factorized on its own and
+    # its (small) list of distinct values is remapped onto a shared list of group keys.
+    keys = {}
+    spellings = []  # per key: original spelling -> number of mentions
+    row_parts = []
+    code_parts = []
+
+    for column in columns:
+        if column not in collisions.columns:
+            continue
+        codes, uniques = pd.factorize(collisions[column])
+        value_counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+        remap = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            spelling = str(value).strip()
+            key = normalize(spelling)
+            if not key:
+                remap[i] = -1
+                continue
+            if key not in keys:
+                keys[key] = len(keys)
+                spellings.append({})
+            remap[i] = keys[key]
+            group = spellings[remap[i]]
+            group[spelling] = group.get(spelling, 0) + int(value_counts[i])
+
+        present = codes >= 0
+        codes = remap[codes[present]]
+        rows = np.flatnonzero(present)[codes >= 0]
+        row_parts.append(rows.astype(np.int32))
+        code_parts.append(codes[codes >= 0])
+
+    rows = np.concatenate(row_parts) if row_parts else np.empty(0, dtype=np.int32)
+    codes = np.concatenate(code_parts) if code_parts else np.empty(0, dtype=np.int32)
+
+    # Show each group under its most common original spelling ('SUV', not 'Suv')
+    labels = [max(group, key=group.get) for group in spellings]
+    return rows, codes, labels
+
+
+def weather_codes_for_crashes(crash_dates, daily_df, categories, category_column='weather_category'):
+    # Dense day-number -> category code table, so each crash is a single array lookup
+    days = daily_df['date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+    day_codes = pd.Categorical(daily_df[category_column], categories=categories).codes
+
+    first_day = days.min()
+    table = np.full(days.max() - first_day + 1, -1, dtype=np.int8)
+    table[days - first_day] = day_codes
+
+    crash_days = crash_dates.to_numpy(dtype='datetime64[D]')
+    valid = ~np.isnat(crash_days)
+    offsets = np.full(len(crash_days), -1, dtype=np.int64)
+    offsets[valid] = crash_days[valid].astype(np.int64) - first_day
+    in_range = (offsets >= 0) & (offsets < len(table))
+
+    crash_codes = np.full(len(crash_days), -1, dtype=np.int8)
+    crash_codes[in_range] = table[offsets[in_range]]
+    return crash_codes
+
+
+def count_matrix(crash_weather, rows, codes, n_categories, n_labels):
+    weather = crash_weather[rows].astype(np.int64)
+    keep = weather >= 0
+    flat = weather[keep] * n_labels + codes[keep]
+    counts = np.bincount(flat, minlength=n_categories * n_labels)
+    return counts.reshape(n_categories, n_labels)
+
+
+def weather_breakdown(collisions, daily_df, categories, columns, normalize=_normalize_factor):
+    crash_weather = weather_codes_for_crashes(collisions['date'], daily_df, categories)
+    rows, codes, labels = encode_long(collisions, columns, normalize)
+    counts = count_matrix(crash_weather, rows, codes, len(categories), len(labels))
+    return pd.DataFrame(counts, index=categories, columns=labels)
+
+
+def factor_breakdown(collisions, daily_df, categories):
+    return weather_breakdown(collisions, daily_df, categories, FACTOR_COLUMNS, _normalize_factor)
+
+
+def vehicle_breakdown(collisions, daily_df, categories):
+    return weather_breakdown(collisions, daily_df, categories, VEHICLE_COLUMNS, _normalize_vehicle)
+
+
+def top_shares(matrix, top_n=15, exclude=('Unspecified',)):
+    # Share of each weather category's mentions (%), limited to the most common labels
+    matrix = matrix.drop(columns=[c for c in exclude if c in matrix.columns])
+    matrix = matrix.loc[matrix.sum(axis=1) > 0]
+    top = matrix.sum(axis=0).sort_values(ascending=False).index[:top_n]
+    shares = matrix[top].div(matrix.sum(axis=1), axis=0) * 100
+    return shares
@@ -0,0 +1,134 @@
+import json
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = 'schema.json'
+SCHEMA_VERSION = 2
+
+LAG_DAYS = (1, 7)
+ROLLING_DAYS = (7, 28)
+
+
+def _file_name(column):
+    # 'precipitation_sum (mm)' -> 'precipitation_sum_mm.npy'
+    return re.sub(r'[^0-9a-zA-Z]+', '_', column).strip('_').lower() + '.npy'
+
+
+def build_daily_features(daily_df, weather_columns, count_columns, category_column, categories,
+                         code_columns=()):
+    # Reindex to a gap-free daily calendar so lags and rolling windows are in days, not rows
+    daily = daily_df.set_index('date').sort_index().asfreq('D')
+
+    features = {'date': daily.index.values.astype('datetime64[D]')}
+
+    for column in weather_columns + count_columns:
+        features[column] = daily[column].to_numpy(dtype=np.float32)
+
+    # Nominal codes (e.g. WMO weather code) stay integers, -1 where the day is missing
+    for column in code_columns:
+        features[column] = daily[column].fillna(-1).to_numpy(dtype=np.int16)
+
+    codes = pd.Categorical(daily[category_column], categories=categories).codes.astype(np.int8)
+    features[category_column] = codes
+    for lag in LAG_DAYS:
+        lagged = np.full(len(codes), -1, dtype=np.int8)
+        lagged[lag:] = codes[:-lag]
+        features[f'{category_column} lag {lag}d'] = lagged
+
+    # Calendar features
+    index = daily.index
+    features['year'] = index.year.to_numpy(dtype=np.int16)
+    features['month'] = index.month.to_numpy(dtype=np.int8)
+    features['day'] = index.day.to_numpy(dtype=np.int8)
+    features['day_of_week'] = index.dayofweek.to_numpy(dtype=np.int8)
+    features['day_of_year'] = index.dayofyear.to_numpy(dtype=np.int16)
+    features['is_weekend'] = (index.dayofweek >= 5).astype(np.int8)
+
+    # Lagged and rolling features (measured quantities only; means of codes are meaningless)
+    for column in weather_columns + count_columns:
+        series = daily[column].astype(np.float64)
+        for lag in LAG_DAYS:
+            features[f'{column} lag {lag}d'] = series.shift(lag).to_numpy(dtype=np.float32)
+        for window in ROLLING_DAYS:
+            rolling = series.rolling(window, min_periods=window).mean()
+            features[f'{column} rolling mean {window}d'] = rolling.to_numpy(dtype=np.float32)
+
+    return features
+
+
+def write_feature_store(features, out_dir, categories=None):
+    os.makedirs(out_dir, exist_ok=True)
+
+    lengths = {len(values) for values in features.values()}
+    if len(lengths) != 1:
+        raise ValueError(f"Feature columns have mismatched lengths: {sorted(lengths)}")
+
+    # Each rebuild goes into a fresh data directory; files a reader may already have
+    # memory-mapped are never overwritten in place
+    data_dir = f'data-{time.time_ns()}'
+    os.makedirs(os.path.join(out_dir, data_dir))
+
+    columns = []
+    file_names = set()
+    for name, values in features.items():
+        values = np.ascontiguousarray(values)
+        file_name = _file_name(name)
+        if file_name in file_names:
+            raise ValueError(f"Column '{name}' collides with another column's file name '{file_name}'")
+        file_names.add(file_name)
+        np.save(os.path.join(out_dir, data_dir, file_name), values, allow_pickle=False)
+        columns.append({'name': name, 'file': file_name, 'dtype': values.dtype.str})
+
+    dates = features['date']
+    schema = {
+        'version': SCHEMA_VERSION,
+        'data_dir': data_dir,
+        'length': lengths.pop(),
+        'start_date': str(dates[0]) if len(dates) else None,
+        'end_date': str(dates[-1]) if len(dates) else None,
+        'columns': columns,
+        'categories': categories or {},
+    }
+
+    schema_path = os.path.join(out_dir, SCHEMA_FILE)
+    previous_data_dir = None
+    if os.path.exists(schema_path):
+        with open(schema_path) as f:
+            previous_data_dir = json.load(f).get('data_dir')
+
+    # Swap the schema in atomically so readers see either the old store or the new one
+    tmp_schema_path = schema_path + '.tmp'
+    with open(tmp_schema_path, 'w') as f:
+        json.dump(schema, f, indent=2)
+    os.replace(tmp_schema_path, schema_path)
+
+    # Keep the previous version for readers that loaded its schema a moment ago;
+    # anything older is removed (open memory maps stay valid after unlinking)
+    for entry in os.listdir(out_dir):
+        if entry.startswith('data-') and entry not in (data_dir, previous_data_dir):
+            shutil.rmtree(os.path.join(out_dir, entry), ignore_errors=True)
+
+    return schema
+
+
+def open_feature_store(path, columns=None):
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        schema = json.load(f)
+
+    if schema['version'] != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported feature store version: {schema['version']}")
+
+    # Read-only memory maps: no parsing, and every process shares the same page cache
+    arrays = {}
+    for column in schema['columns']:
+        if columns is not None and column['name'] not in columns:
+            continue
+        arrays[column['name']] = np.load(os.path.join(path, schema['data_dir'], column['file']),
+                                         mmap_mode='r', allow_pickle=False)
+
+    return arrays, schema
@@ -4,6 +4,7 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 import h3  
+from borough_lookup import backfill_borough
 
 weather_data = pd.read_csv('data/weather-manhattan-meteo.csv', 
                           skiprows=2,  # Skip the first two rows
@@ -19,6 +20,15 @@ weather_data['date'] = pd.to_datetime(weather_data.iloc[:, 0])
 
 collision_data['date'] = pd.to_datetime(collision_data['CRASH DATE'])
 
+# Backfill blank BOROUGH values from coordinates so borough filters don't undercount
+collision_data, cleared_coords, backfilled = backfill_borough(
+    collision_data,
+    'data/borough_boundaries.geojson',
+    'data/borough_h3_lookup.npz'
+)
+print(f"Cleared (0,0) or out-of-city coordinates on {cleared_coords} collisions")
+print(f"Backfilled BOROUGH for {backfilled} collisions from their coordinates")
+
 manhattan_collisions = collision_data[collision_data['BOROUGH'] == 'MANHATTAN']
 
 manhattan_collisions_with_coords = manhattan_collisions.dropna(subset=['LATITUDE', 'LONGITUDE'])
@@ -232,6 +242,48 @@ def categorize_weather(code):
 # Add weather category to the filtered dataframe
 filtered_df['weather_category'] = filtered_df['weather_code (wmo code)'].apply(categorize_weather)
 
+# ---- Daily Feature Store (memory-mapped arrays for modelling) ----
+
+from feature_store import build_daily_features, write_feature_store
+
+# Numeric weather variables only (sunrise/sunset style columns are strings). The WMO
+# weather code is nominal, so it is stored as an integer code without lags or rolling means.
+code_columns = ['weather_code (wmo code)']
+weather_columns = [col for col in weather_data.columns
+                   if col not in (original_time_col, 'date', *code_columns)
+                   and pd.api.types.is_numeric_dtype(weather_data[col])]
+count_columns = ['collision_count', 'injuries_count', 'fatalities_count']
+category_names = list(weather_categories) + ['Other']
+
+daily_features = build_daily_features(filtered_df, weather_columns, count_columns,
+                                      'weather_category', category_names, code_columns)
+feature_schema = write_feature_store(daily_features, 'data/feature_store',
+                                     categories={'weather_category': category_names})
+print(f"Feature store with {len(feature_schema['columns'])} columns x {feature_schema['length']} days "
+      f"saved to 'data/feature_store'")
+
+# ---- Analysis: Crashes Around Precipitation Onset ----
+
+from event_windows import (crash_timestamps, detect_onsets, count_in_windows, summarize_windows,
+                           longest_lookback, DAILY_ONSET_THRESHOLDS, DEFAULT_WINDOWS)
+
+# The Open-Meteo export is daily, so onsets land at midnight of the first wet day and
+# the 3h/6h windows count from midnight, not from when rain or snow actually began.
+# An hourly export needs HOURLY_ONSET_THRESHOLDS, which match its column names.
+manhattan_crash_times = crash_timestamps(manhattan_collisions)
+onsets = detect_onsets(filtered_df, thresholds=DAILY_ONSET_THRESHOLDS,
+                       dry_lookback=longest_lookback(DEFAULT_WINDOWS))
+onset_counts = count_in_windows(manhattan_crash_times, onsets)
+onset_summary = summarize_windows(onset_counts)
+
+print(f"Detected {len(onsets)} precipitation onset events")
+if (onsets['weather_resolution'] == 'daily').any():
+    print("Note: weather input is daily, so onset times are midnight and all window counts are day-level")
+print(onset_summary.to_string(index=False))
+
+onset_counts.to_csv('data/weather_onset_windows_2013_2024.csv', index=False)
+print("Onset window counts saved to 'data/weather_onset_windows_2013_2024.csv'")
+
 # Clear any previous traces and create a completely new figure
 fig2 = make_subplots(rows=1, cols=2, 
                     column_widths=[0.7, 0.3],
@@ -662,13 +714,76 @@ print("Hexbin map saved to 'visuals/manhattan_collision_hexbin_2024.html'")
 # merged_with_location.to_csv('data/weather_collision_location_merged_2013_2024.csv', index=False)
 # print("Merged dataset with location data saved to 'data/weather_collision_location_merged_2013_2024.csv'")
 
-# ---- Create a Dashboard with All Three Visualizations ----
+# ---- Visualization: Contributing Factors and Vehicle Types by Weather ----
+
+from factor_breakdown import factor_breakdown, vehicle_breakdown, top_shares
+
+factor_counts = factor_breakdown(manhattan_collisions, filtered_df, category_names)
+vehicle_counts = vehicle_breakdown(manhattan_collisions, filtered_df, category_names)
+print(f"Encoded {int(factor_counts.values.sum())} contributing factor and "
+      f"{int(vehicle_counts.values.sum())} vehicle type mentions")
+
+# Share of each weather condition's mentions, so conditions with few days stay comparable
+factor_shares = top_shares(factor_counts)
+vehicle_shares = top_shares(vehicle_counts)
+
+heatmap_colorscale = [
+    [0.0, 'rgb(95,47,143)'],
+    [0.25, 'rgb(178,54,144)'],
+    [0.5, 'rgb(255,90,104)'],
+    [0.75, 'rgb(255,177,58)'],
+    [1.0, 'rgb(255,255,200)']
+]
+
+fig4 = make_subplots(rows=1, cols=2,
+                     subplot_titles=('Contributing Factor', 'Vehicle Type'),
+                     horizontal_spacing=0.2)
+
+for col, shares in enumerate([factor_shares, vehicle_shares], start=1):
+    fig4.add_trace(
+        go.Heatmap(
+            z=shares.T.values,
+            x=shares.index,
+            y=shares.columns,
+            coloraxis='coloraxis',
+            hovertemplate="<b>%{y}</b><br>Weather: %{x}<br>Share: %{z:.1f}%<extra></extra>"
+        ),
+        row=1, col=col
+    )
+
+# Both panels share one colour scale so the single colorbar reads correctly for each
+fig4.update_layout(
+    coloraxis=dict(
+        colorscale=heatmap_colorscale,
+        colorbar=dict(title='% of mentions')
+    ),
+    title=dict(
+        text='<b>Manhattan Collision Factors and Vehicle Types by Weather (2013-2024)</b>',
+        font=dict(color='white', size=24, family='Arial Black'),
+        x=0.5,
+        y=0.97
+    ),
+    template='plotly_dark',
+    height=700,
+    paper_bgcolor='#1e1e1e',
+    plot_bgcolor='#1e1e1e',
+    font=dict(color='white'),
+    margin=dict(t=120)
+)
+fig4.update_yaxes(autorange='reversed')
+
+fig4.show()
+fig4.write_html("visuals/manhattan_weather_factor_breakdown.html")
+print("Factor breakdown visualization saved to 'visuals/manhattan_weather_factor_breakdown.html'")
+
+# ---- Create a Dashboard with All Four Visualizations ----
 
 def create_dashboard():
 
     yearly_html = fig.to_html(include_plotlyjs='cdn', full_html=False, config={'displayModeBar': False})
     weather_html = fig2.to_html(include_plotlyjs='cdn', full_html=False, config={'displayModeBar': False})
     hexmap_html = fig3.to_html(include_plotlyjs='cdn', full_html=False, config={'displayModeBar': False})
+    factors_html = fig4.to_html(include_plotlyjs='cdn', full_html=False, config={'displayModeBar': False})
     
     # Create the dashboard HTML with a completely different approach
     dashboard_html = f'''
@@ -683,7 +798,8 @@ def create_dashboard():
                 padding: 0;
                 background-color: #121212;
                 color: white;
-                overflow: hidden;
+                overflow-x: hidden;
+                overflow-y: auto;
             }}
             .dashboard-container {{
                 display: flex;
@@ -728,6 +844,15 @@ def create_dashboard():
             .right-panel .viz-container {{
                 height: 100%;
             }}
+            .bottom-panel {{
+                width: 100%;
+                height: 740px;
+                padding: 0 10px 10px 10px;
+                box-sizing: border-box;
+            }}
+            .bottom-panel .viz-container {{
+                height: 100%;
+            }}
             iframe {{
                 width: 100%;
                 height: 100%;
@@ -754,6 +879,11 @@ def create_dashboard():
                 </div>
             </div>
         </div>
+        <div class="bottom-panel">
+            <div class="viz-container">
+                <iframe src="manhattan_weather_factor_breakdown.html"></iframe>
+            </div>
+        </div>
     </body>
     </html>
     '''
@@ -771,3 +901,50 @@ def create_dashboard():
     webbrowser.open(file_url)
 
 create_dashboard()
+
+# ---- Static Image Export (PNG/SVG) ----
+
+from static_export import export_static_images, renderer_problem
+
+# One static copy of the year-selector figure per year
+def weather_figure_for_year(year):
+    year_fig = go.Figure(fig2)
+    visible_traces = set(year_traces[year])
+    for trace_idx, trace in enumerate(year_fig.data):
+        trace.visible = trace_idx in visible_traces
+    year_fig.update_layout(
+        title_text=f"<b>Manhattan Traffic Collisions by Weather Condition ({year})</b>",
+        updatemenus=[dict(active=years.index(year))]
+    )
+    return year_fig
+
+# The live map pulls carto-darkmatter tiles and label fonts over the network. The static
+# copy swaps in a plain dark background and drops marker text so it renders offline.
+def offline_hexmap_figure():
+    static_fig = go.Figure(fig3)
+    static_fig.update_layout(mapbox_style=dict(
+        version=8,
+        sources={},
+        layers=[dict(id='background', type='background', paint={'background-color': '#1e1e1e'})]
+    ))
+    static_fig.update_traces(mode='markers', selector=dict(mode='markers+text'))
+    return static_fig
+
+static_jobs = [
+    ('totalsbyear', fig, 1400, 600),
+    ('monthlyaccsbyweather', fig2, 1400, 600),
+    ('heatmap', offline_hexmap_figure(), 1000, 1050),
+    ('factorsbyweather', fig4, 1600, 700),
+]
+for year in years:
+    static_jobs.append((f'monthlyaccsbyweather_{year}', weather_figure_for_year(year), 1400, 600))
+
+renderer_issue = renderer_problem()
+if renderer_issue is not None:
+    print(f"Skipping static image export: {renderer_issue}")
+else:
+    try:
+        static_paths = export_static_images(static_jobs, 'visuals/static')
+        print(f"Exported {len(static_paths)} static images to 'visuals/static'")
+    except RuntimeError as e:
+        print(f"Static image export failed: {e}")
@@ -0,0 +1,100 @@
+import os
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from importlib import metadata
+
+import plotly
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Set in each worker if its renderer fails to start, so jobs report the real cause
+_renderer_error = None
+
+
+def _version_tuple(version):
+    return tuple(int(part) for part in re.findall(r'\d+', version)[:2])
+
+
+# Check Kaleido is installed and usable with this plotly; returns a problem description or None
+def renderer_problem():
+    try:
+        kaleido_version = metadata.version('kaleido')
+    except metadata.PackageNotFoundError:
+        return "Kaleido is not installed (pip install \"kaleido==0.2.*\" for plotly 5)"
+
+    # plotly < 6.1 only speaks the 0.2.x kaleido.scopes API
+    if _version_tuple(kaleido_version) >= (1, 0) and _version_tuple(plotly.__version__) < (6, 1):
+        return (f"Kaleido {kaleido_version} needs plotly>=6.1 but plotly {plotly.__version__} "
+                f"is installed; install \"kaleido==0.2.*\" or upgrade plotly")
+    return None
+
+
+# Start one renderer per worker and keep it alive for every export that worker handles
+def _init_renderer():
+    global _renderer_error
+    try:
+        import kaleido
+        if hasattr(kaleido, 'start_sync_server'):  # kaleido >= 1.0 reuses one browser per process
+            kaleido.start_sync_server(silence_warnings=True)
+
+        # Render a blank figure so the renderer is warm before the first real job arrives
+        pio.to_image(go.Figure(), format='png', width=10, height=10)
+    except Exception as e:
+        _renderer_error = e
+
+
+def _render(fig_json, path, fmt, width, height, scale):
+    if _renderer_error is not None:
+        raise RuntimeError(f"renderer failed to start: {_renderer_error!r}") from _renderer_error
+    fig = pio.from_json(fig_json)
+    pio.write_image(fig, path, format=fmt, width=width, height=height, scale=scale)
+    return path
+
+
+def export_static_images(jobs, out_dir, formats=('png', 'svg'), max_workers=None, scale=1):
+    # jobs: list of (name, figure, width, height)
+    if not jobs:
+        return []
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    tasks = []
+    for name, fig, width, height in jobs:
+        # Serialize once per figure; JSON is cheap to ship to workers
+        fig_json = fig.to_json()
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{name}.{fmt}")
+            tasks.append((fig_json, path, fmt, width, height, scale))
+
+    # Workers must fork: spawn would re-run the analysis script in every worker.
+    # Without fork (Windows), render serially in this process with one renderer.
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        _init_renderer()
+        written = []
+        for task in tasks:
+            try:
+                written.append(_render(*task))
+            except Exception as e:
+                raise RuntimeError(f"exporting {task[1]} failed: {e}") from e
+        return sorted(written)
+
+    if max_workers is None:
+        max_workers = min(len(tasks), os.cpu_count() or 1)
+
+    written = []
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             mp_context=multiprocessing.get_context('fork'),
+                             initializer=_init_renderer) as pool:
+        futures = {pool.submit(_render, *task): task[1] for task in tasks}
+
+        for future in as_completed(futures):
+            try:
+                written.append(future.result())
+            except BrokenProcessPool as e:
+                raise RuntimeError("a render worker process died unexpectedly") from e
+            except Exception as e:
+                raise RuntimeError(f"exporting {futures[future]} failed: {e}") from e
+
+    return sorted(written)